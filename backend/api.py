@@ -2,20 +2,30 @@
 
 # Standard library imports
 import os
+import json
 import asyncio
+import logging
 from pathlib import Path
+from stat import S_ISREG
+from typing import Optional
 
 # Third-party imports
-from fastapi import (APIRouter, BackgroundTasks, Depends, HTTPException, Path as FastAPIPath, status)
-from fastapi.responses import FileResponse
+from fastapi import (APIRouter, BackgroundTasks, Depends, HTTPException, Path as FastAPIPath, Query, Request, WebSocket, WebSocketDisconnect, status)
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from sqlmodel import Session, select
 
+# Optional binary encoding for job status payloads
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 # Local application imports
 from .config import settings
 from .logger_config import logger
-from .models import (CreatePostRequest, CreatePostResponse, Job, JobStatusResponse, PublishRequest, PublishResponse, RegenerateRequest, get_session)
+from .models import (CreatePostRequest, CreatePostResponse, Job, JobStatusResponse, PublishRequest, PublishResponse, RegenerateRequest, engine, get_session)
 from .providers import provider
-from .services import (create_job, publish_to_linkedin, regenerate_content, run_job)
+from .services import (create_job, get_job_progress, notify_status_change, publish_to_linkedin, regenerate_content, run_job, wait_for_status_change)
 from .storage import get_job_files
 
 # Create API router
@@ -24,6 +34,18 @@ app = APIRouter()
 # Add a helper for consistent log prefix
 LOG_PREFIX = "[api.py]"
 
+# Statuses after which a job no longer changes on its own
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+# Seconds between keepalive messages on the job status WebSocket
+STATUS_HEARTBEAT_SECONDS = 10
+
+# Upper bound on how long a status long-poll may be held open
+MAX_STATUS_WAIT_SECONDS = 25
+
+# Images are regenerated in place, so clients may cache them but must revalidate by ETag
+IMAGE_CACHE_CONTROL = "public, no-cache"
+
 # Add cancel endpoint to router (APIRouter)
 @app.post("/posts/{job_id}/cancel", status_code=status.HTTP_200_OK)
 async def cancel_post(job_id: str, session: Session = Depends(get_session)):
@@ -38,6 +60,7 @@ async def cancel_post(job_id: str, session: Session = Depends(get_session)):
             raise HTTPException(status_code=400, detail="Job cannot be cancelled in its current state")
         job.status = "cancelled"
         session.commit()
+        notify_status_change(job_id)
         logger.info(f"{LOG_PREFIX} cancel_post: Job {job_id} cancelled successfully")
         return {"job_id": job_id, "status": "cancelled"}
     except HTTPException:
@@ -48,34 +71,47 @@ async def cancel_post(job_id: str, session: Session = Depends(get_session)):
 
 
 # Serve image files by job_id and variant (A/B)
-@app.get("/api/v1/images/{job_id}/{variant}.png") # Ensure the full path is defined in the decorator
+@app.get("/images/{job_id}/{variant}.png") # Router is mounted under /api/v1
 async def serve_image(
+    request: Request,
     job_id: str = FastAPIPath(..., description="Job ID"),
     variant: str = FastAPIPath(..., description="Variant (A or B)")
 ):
     logger.info(f"{LOG_PREFIX} serve_image: called for job_id={job_id}, variant={variant}")
     """Serve generated image files by job_id and variant (A/B)."""
-    logger.info(f"serve_image called for job_id={job_id}, variant={variant}")
-    logger.info(f"{LOG_PREFIX} serve_image: Configured settings.base_dir: {settings.base_dir}")
     
     try:
-        # Construct the full path to the image file
-        image_path = settings.base_dir / "tmp" / job_id / "images" / f"{variant}.png"
-        logger.info(f"{LOG_PREFIX} serve_image: Constructed full image_path: {image_path}")
+        # Construct the full path to the image file (tmp_dir is resolved once in settings)
+        image_path = settings.tmp_dir / job_id / "images" / f"{variant}.png"
         
-        # Check if the file actually exists
-        if not image_path.exists():
+        # One stat covers existence, file type and the cache validator
+        try:
+            stat_result = image_path.stat()
+        except FileNotFoundError:
             logger.error(f"Image file not found on disk at: {image_path}")
             raise HTTPException(status_code=404, detail=f"Image not found at {image_path}")
         
         # Check if it's actually a file (not a directory)
-        if not image_path.is_file():
+        if not S_ISREG(stat_result.st_mode):
             logger.error(f"Path exists but is not a file: {image_path}")
             raise HTTPException(status_code=500, detail=f"Path is not a file: {image_path}")
 
-        logger.info(f"{LOG_PREFIX} serve_image: Serving image from: {image_path}")
+        # Strong validator from the file's mtime and size; unchanged images get a bodiless 304
+        etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        cache_headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{LOG_PREFIX} serve_image: Serving image from: {image_path}")
         # Return the file response
-        return FileResponse(path=str(image_path), media_type="image/png", filename=f"{variant}.png")
+        return FileResponse(
+            path=str(image_path),
+            media_type="image/png",
+            filename=f"{variant}.png",
+            headers=cache_headers,
+            stat_result=stat_result
+        )
         
     except HTTPException:
         # Re-raise HTTPExceptions (like 404)
@@ -119,8 +155,65 @@ async def create_post(
         raise HTTPException(status_code=500, detail="Internal server error")
 
         
+def build_job_status_response(job_id: str, job: Job) -> JobStatusResponse:
+    """Build the status payload for a job, including its result once completed."""
+    result = {}
+    result_error = None
+    
+    # If job is completed, include the result
+    if job.status == "completed":
+        job_files = get_job_files(job_id)
+        if job_files and "result" in job_files:
+            try:
+                # Use the storage helper to read the JSON result
+                from .storage import read_json
+                result = read_json(job_files["result"])
+                
+                # Patch image_path in post_variants to be API URLs
+                if result and "post_variants" in result:
+                    for variant in result["post_variants"]:
+                        variant_id = variant.get("id")
+                        if variant_id:
+                            # Ensure the image path is an API URL, not a file path
+                            variant["image_path"] = f"/api/v1/images/{job_id}/{variant_id}.png"
+                
+                if not result:
+                    result_error = "Result file is empty"
+                    logger.error(f"{LOG_PREFIX} get_post_status: Result file is empty for job {job_id}")
+            except Exception as e:
+                logger.error(f"{LOG_PREFIX} get_post_status: Failed to read result file for job {job_id}: {e}")
+                result_error = f"Failed to read result file: {e}"
+        else:
+            result_error = "Job files not found"
+            logger.error(f"{LOG_PREFIX} get_post_status: Job files not found for job {job_id}")
+    else:
+        result_error = "Job not completed"
+        logger.error(f"{LOG_PREFIX} get_post_status: Job {job_id} is not completed yet")
+    
+    if job.status == "completed":
+        progress, stage = 100, "Completed"
+    else:
+        progress, stage = get_job_progress(job_id)
+
+    response = JobStatusResponse(
+        job_id=job_id,
+        status=job.status if job else "",
+        progress=progress,
+        stage=stage,
+        error=job.error if job and job.error is not None else "",  # Convert None to empty string
+        result=result
+    )
+    return response
+
+
 @app.get("/posts/{job_id}", response_model=JobStatusResponse)
-async def get_post_status(job_id: str, session: Session = Depends(get_session)):
+async def get_post_status(
+    job_id: str,
+    request: Request,
+    wait: float = Query(0, ge=0, le=MAX_STATUS_WAIT_SECONDS, description="Seconds to hold the request open waiting for a change"),
+    since_status: Optional[str] = Query(None, description="Status the client already has; only waits while the job is still in it"),
+    session: Session = Depends(get_session)
+):
     logger.info(f"{LOG_PREFIX} get_post_status: Fetching status for job_id={job_id}")
     """Get the status and result of a post generation job."""
     logger.info(f"Fetching status for job_id={job_id}")
@@ -130,45 +223,23 @@ async def get_post_status(job_id: str, session: Session = Depends(get_session)):
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        result = {}
-        result_error = None
+        # Long-poll: hold the request until the job changes or the wait expires
+        if wait and since_status and job.status == since_status:
+            # Release the DB connection while waiting
+            session.close()
+            await wait_for_status_change(job_id, wait)
+            job = session.exec(select(Job).where(Job.job_id == job_id)).first()
+            if not job:
+                raise HTTPException(status_code=404, detail="Job not found")
         
-        # If job is completed, include the result
-        if job.status == "completed":
-            job_files = get_job_files(job_id)
-            if job_files and "result" in job_files:
-                try:
-                    # Use the storage helper to read the JSON result
-                    from .storage import read_json
-                    result = read_json(job_files["result"])
-                    
-                    # Patch image_path in post_variants to be API URLs
-                    if result and "post_variants" in result:
-                        for variant in result["post_variants"]:
-                            variant_id = variant.get("id")
-                            if variant_id:
-                                # Ensure the image path is an API URL, not a file path
-                                variant["image_path"] = f"/api/v1/images/{job_id}/{variant_id}.png"
-                    
-                    if not result:
-                        result_error = "Result file is empty"
-                        logger.error(f"{LOG_PREFIX} get_post_status: Result file is empty for job {job_id}")
-                except Exception as e:
-                    logger.error(f"{LOG_PREFIX} get_post_status: Failed to read result file for job {job_id}: {e}")
-                    result_error = f"Failed to read result file: {e}"
-            else:
-                result_error = "Job files not found"
-                logger.error(f"{LOG_PREFIX} get_post_status: Job files not found for job {job_id}")
-        else:
-            result_error = "Job not completed"
-            logger.error(f"{LOG_PREFIX} get_post_status: Job {job_id} is not completed yet")
+        response = build_job_status_response(job_id, job)
         
-        response = JobStatusResponse(
-            job_id=job_id,
-            status=job.status if job else "",
-            error=job.error if job and job.error is not None else "",  # Convert None to empty string
-            result=result
-        )
+        # Clients that accept msgpack get the smaller binary encoding
+        if msgpack and "application/msgpack" in request.headers.get("accept", ""):
+            return Response(
+                content=msgpack.packb(response.model_dump(), use_bin_type=True),
+                media_type="application/msgpack"
+            )
         return response
     except HTTPException:
         raise
@@ -177,6 +248,75 @@ async def get_post_status(job_id: str, session: Session = Depends(get_session)):
         raise HTTPException(status_code=500, detail="Internal server error")
         
 
+async def job_status_updates(job_id: str):
+    """Yield the job's status on every state change, with periodic heartbeats, until it finishes."""
+    last_status = None
+    last_progress = None
+    last_stage = None
+    while True:
+        with Session(engine) as session:
+            job = session.exec(select(Job).where(Job.job_id == job_id)).first()
+            if not job:
+                yield {"job_id": job_id, "status": "not_found", "error": "Job not found"}
+                return
+            if job.status != last_status or get_job_progress(job_id)[0] != last_progress:
+                response = build_job_status_response(job_id, job)
+            else:
+                response = None
+
+        if response is not None:
+            last_status = response.status
+            last_progress = response.progress
+            last_stage = response.stage
+            yield response.model_dump()
+            if last_status in TERMINAL_STATUSES:
+                return
+
+        # Sleep until the worker reports a transition; a timeout sends a keepalive
+        # so dead clients are detected and the frontend can refresh its timer.
+        # It repeats the last progress so clients can render it like any update
+        changed = await wait_for_status_change(job_id, STATUS_HEARTBEAT_SECONDS)
+        if not changed:
+            yield {
+                "job_id": job_id,
+                "status": last_status,
+                "progress": last_progress,
+                "stage": last_stage,
+                "heartbeat": True
+            }
+
+
+@app.websocket("/ws/posts/{job_id}")
+async def job_status_ws(websocket: WebSocket, job_id: str):
+    """Push the job status to the client on every state change until the job finishes."""
+    logger.info(f"{LOG_PREFIX} job_status_ws: Client connected for job_id={job_id}")
+    await websocket.accept()
+    try:
+        async for payload in job_status_updates(job_id):
+            await websocket.send_json(payload)
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info(f"{LOG_PREFIX} job_status_ws: Client disconnected for job_id={job_id}")
+    except Exception as e:
+        logger.error(f"Job status WebSocket failed for {job_id}: {e}")
+
+
+@app.get("/posts/{job_id}/events")
+async def job_status_events(job_id: str):
+    """Stream the job status as Server-Sent Events until the job finishes."""
+    logger.info(f"{LOG_PREFIX} job_status_events: Client connected for job_id={job_id}")
+
+    async def event_stream():
+        async for payload in job_status_updates(job_id):
+            yield f"data: {json.dumps(payload)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/posts/{job_id}/regenerate", response_model=CreatePostResponse)
 async def regenerate_post(
     job_id: str,
@@ -207,6 +347,7 @@ async def regenerate_post(
         # Update job status to in_progress
         job.status = "in_progress"
         session.commit()
+        notify_status_change(job_id)
     
         # Schedule regeneration in background (async)
         asyncio.create_task(regenerate_content(job_id, request.regenerate, request.variant))
@@ -288,6 +429,7 @@ def update_job_status(session: Session, job_id: str, status: str):
         if job:
             job.status = status
             session.commit()
+            notify_status_change(job_id)
     except Exception as e:
         logger.error(f"Failed to update job status for {job_id}: {e}")
 
@@ -1,34 +1,51 @@
 # backend\logger_config.py
 
 # Standard library imports
+import os
 import sys
+import queue
+import atexit
 import functools
 import asyncio
 
 # Third-party imports
 import logging
+import logging.handlers
 
 # Typing imports
 from typing import Optional, Callable, Any
 
-def setup_logging(level: str = "INFO", log_format: Optional[str] = None) -> logging.Logger:
+# Background listener draining queued log records to stdout
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def setup_logging(level: Optional[str] = None, log_format: Optional[str] = None) -> logging.Logger:
     """Setup logging configuration for the application and return the app logger."""
+    if level is None:
+        level = os.environ.get("LOG_LEVEL", "INFO")
+    log_level = getattr(logging, level.upper(), logging.INFO)
     if log_format is None:
         log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
-    # Configure root logger handlers (only once)
+    # Configure root logger handlers (only once). Records are queued on the calling
+    # thread and written to stdout by a background listener.
+    global _listener
     root = logging.getLogger()
     if not root.handlers:
         handler = logging.StreamHandler(sys.stdout)
         formatter = logging.Formatter(log_format)
         handler.setFormatter(formatter)
-        root.setLevel(getattr(logging, level.upper(), logging.INFO))
-        root.addHandler(handler)
+        log_queue: queue.Queue = queue.Queue(-1)
+        _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        root.setLevel(log_level)
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
 
     # Create/get application logger
     logger = logging.getLogger("ai_social_post")
-    # Keep application-level logs at INFO by default to avoid very noisy ENTER/EXIT debug spam
-    logger.setLevel(logging.INFO)
+    # Keep application-level logs at INFO by default to avoid very noisy ENTER/EXIT debug spam;
+    # set LOG_LEVEL=DEBUG to opt in
+    logger.setLevel(log_level)
 
     # Reduce verbosity for noisy third-party libraries
     logging.getLogger('sqlalchemy').setLevel(logging.WARNING)
@@ -39,31 +56,59 @@ def setup_logging(level: str = "INFO", log_format: Optional[str] = None) -> logg
 def log_call(logger: logging.Logger) -> Callable[..., Callable[..., Any]]:
     """Decorator factory that logs entry/exit and exceptions for sync and async functions.
 
-    Usage: 
+    When the logger is above DEBUG at decoration time only exceptions are logged.
+    Lowering the log level to DEBUG later does not add entry/exit logging to
+    already-decorated functions.
+
+    Usage: @log_call(logger)
     """
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        # Resolve names and bound logger methods once instead of on every call
+        mod = func.__module__
+        name = func.__name__
+        debug = logger.debug
+        exception = logger.exception
+        if logger.getEffectiveLevel() > logging.DEBUG:
+            # Entry/exit lines would be dropped anyway; keep only the exception logging
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_error_wrapper(*args: Any, **kwargs: Any) -> Any:
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as exc:
+                        exception(f"ERROR {mod}.{name}() -> {exc}")
+                        raise
+                return async_error_wrapper
+            @functools.wraps(func)
+            def sync_error_wrapper(*args: Any, **kwargs: Any) -> Any:
+                try:
+                    return func(*args, **kwargs)
+                except Exception as exc:
+                    exception(f"ERROR {mod}.{name}() -> {exc}")
+                    raise
+            return sync_error_wrapper
         if asyncio.iscoroutinefunction(func):
             @functools.wraps(func)
             async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
-                logger.debug(f"ENTER {func.__module__}.{func.__name__}() args={len(args)} kwargs={list(kwargs.keys())}")
+                debug(f"ENTER {mod}.{name}() args={len(args)} kwargs={list(kwargs.keys())}")
                 try:
                     result = await func(*args, **kwargs)
-                    logger.debug(f"EXIT  {func.__module__}.{func.__name__}() ok")
+                    debug(f"EXIT  {mod}.{name}() ok")
                     return result
                 except Exception as exc:
-                    logger.exception(f"ERROR {func.__module__}.{func.__name__}() -> {exc}")
+                    exception(f"ERROR {mod}.{name}() -> {exc}")
                     raise
             return async_wrapper
         else:
             @functools.wraps(func)
             def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
-                logger.debug(f"ENTER {func.__module__}.{func.__name__}() args={len(args)} kwargs={list(kwargs.keys())}")
+                debug(f"ENTER {mod}.{name}() args={len(args)} kwargs={list(kwargs.keys())}")
                 try:
                     result = func(*args, **kwargs)
-                    logger.debug(f"EXIT  {func.__module__}.{func.__name__}() ok")
+                    debug(f"EXIT  {mod}.{name}() ok")
                     return result
                 except Exception as exc:
-                    logger.exception(f"ERROR {func.__module__}.{func.__name__}() -> {exc}")
+                    exception(f"ERROR {mod}.{name}() -> {exc}")
                     raise
             return sync_wrapper
     return decorator
@@ -35,6 +35,8 @@ class PublishRequest(BaseModel):
 class JobStatusResponse(BaseModel):
     job_id: str
     status: str
+    progress: int = 0  # 0-100 through the generation pipeline
+    stage: str = ""
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
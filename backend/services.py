@@ -2,11 +2,13 @@
 
 # Standard library imports
 import uuid
+import logging
 import json
 import re
 import ast
+import asyncio
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 # Third-party imports
 from sqlmodel import Session, select
@@ -26,6 +28,58 @@ from .prompts import (
 
 LOG_PREFIX = "[services.py]"
 
+# Coroutines waiting on a job status transition, keyed by job_id
+_status_waiters: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = {}
+
+
+def notify_status_change(job_id: str) -> None:
+    """Wake everything waiting on a status transition for job_id. Safe to call from any thread."""
+    waiter = _status_waiters.pop(job_id, None)
+    if waiter is not None:
+        loop, event = waiter
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            # Event loop already closed; nobody is left waiting
+            pass
+
+
+# Pipeline stages reported to clients as (progress percent, stage label)
+PIPELINE_STAGES = {
+    "scrape": (10, "Scraping article content"),
+    "summary": (30, "Generating summary"),
+    "variants": (50, "Creating post variants"),
+    "images": (70, "Generating images"),
+    "moderation": (90, "Moderating content"),
+}
+
+# Latest pipeline stage of each running job, keyed by job_id
+_job_progress: Dict[str, Tuple[int, str]] = {}
+
+
+def set_job_progress(job_id: str, stage: str) -> None:
+    """Record the pipeline stage a job has reached and wake status listeners."""
+    _job_progress[job_id] = PIPELINE_STAGES[stage]
+    notify_status_change(job_id)
+
+
+def get_job_progress(job_id: str) -> Tuple[int, str]:
+    """Return (progress percent, stage label) for a running job."""
+    return _job_progress.get(job_id, (0, ""))
+
+
+async def wait_for_status_change(job_id: str, timeout: float) -> bool:
+    """Wait for the next status transition of job_id. Returns False if the timeout expires first."""
+    waiter = _status_waiters.get(job_id)
+    if waiter is None:
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        _status_waiters[job_id] = waiter
+    try:
+        await asyncio.wait_for(waiter[1].wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
 def _coerce_response_to_str(resp) -> str:
     """Coerce various response shapes (str, list, dict, objects) to a single string."""
     logger.info(f"{LOG_PREFIX} _coerce_response_to_str: Coercing response to string")
@@ -102,17 +156,17 @@ async def create_job(url: str, opinion: str, tone: str, image_options: Dict[str,
     # Reachability check: try HEAD then GET with retries
     try:
         import httpx
-        import time
 
+        # Async client and sleep so the checks and backoff don't block the event loop
         last_exc = None
-        for attempt in range(3):
-            try:
-                with httpx.Client(follow_redirects=True, timeout=10.0) as client:
+        async with httpx.AsyncClient(follow_redirects=True, timeout=10.0) as client:
+            for attempt in range(3):
+                try:
                     # Prefer HEAD to be lightweight
                     try:
-                        resp = client.head(url)
+                        resp = await client.head(url)
                     except Exception:
-                        resp = client.get(url)
+                        resp = await client.get(url)
 
                     status = getattr(resp, 'status_code', None)
                     if status is not None and status < 400:
@@ -120,7 +174,7 @@ async def create_job(url: str, opinion: str, tone: str, image_options: Dict[str,
                     # if status indicates error, try GET once
                     if status is not None and status >= 400:
                         try:
-                            resp = client.get(url)
+                            resp = await client.get(url)
                             status = getattr(resp, 'status_code', None)
                             if status is not None and status < 400:
                                 break
@@ -128,15 +182,15 @@ async def create_job(url: str, opinion: str, tone: str, image_options: Dict[str,
                             last_exc = e
                             # fallthrough to retry
                     last_exc = None
-            except Exception as e:
-                last_exc = e
-            # backoff
-            time.sleep(1 + attempt)
-        else:
-            # All attempts failed
-            msg = f"URL reachability check failed for {url}: {last_exc or 'no response'}"
-            logger.warning(msg)
-            raise ValueError(msg)
+                except Exception as e:
+                    last_exc = e
+                # backoff
+                await asyncio.sleep(1 + attempt)
+            else:
+                # All attempts failed
+                msg = f"URL reachability check failed for {url}: {last_exc or 'no response'}"
+                logger.warning(msg)
+                raise ValueError(msg)
     except ImportError:
         # httpx not available — fall back to syntactic validation but warn
         logger.warning(f"{LOG_PREFIX} create_job: httpx not available; skipping reachability check")
@@ -204,6 +258,7 @@ async def run_job(job_id: str) -> None:
             job_image_options = job.get_image_options()
             job.status = "in_progress"
             session.commit()
+        notify_status_change(job_id)
 
         logger.info(f"{LOG_PREFIX} run_job: Starting job pipeline for {job_id}")
 
@@ -213,6 +268,7 @@ async def run_job(job_id: str) -> None:
             if job and job.status == "cancelled":
                 logger.info(f"{LOG_PREFIX} run_job: Job {job_id} cancelled during scrape step.")
                 return
+        set_job_progress(job_id, "scrape")
         scrape_data = await scrape_url(job_url)
         scrape_path = get_job_files(job_id)["scrape"]
         await save_json(scrape_data, scrape_path)
@@ -223,6 +279,7 @@ async def run_job(job_id: str) -> None:
             if job and job.status == "cancelled":
                 logger.info(f"{LOG_PREFIX} run_job: Job {job_id} cancelled during summary step.")
                 return
+        set_job_progress(job_id, "summary")
         summary_data = await generate_summary_with_langchain(scrape_data["main_text"])
         summary_path = get_job_files(job_id)["summary"]
         with open(summary_path, 'w', encoding='utf-8') as f:
@@ -234,6 +291,7 @@ async def run_job(job_id: str) -> None:
             if job and job.status == "cancelled":
                 logger.info(f"{LOG_PREFIX} run_job: Job {job_id} cancelled during variants step.")
                 return
+        set_job_progress(job_id, "variants")
         variants = await generate_post_variants_with_langchain(
             summary_data.get("summary", ""),
             summary_data.get("bullets", []),
@@ -248,6 +306,7 @@ async def run_job(job_id: str) -> None:
             if job and job.status == "cancelled":
                 logger.info(f"{LOG_PREFIX} run_job: Job {job_id} cancelled during image generation step.")
                 return
+        set_job_progress(job_id, "images")
         images = await generate_images_with_langchain(variants, job_image_options, job_id)
 
         # Step 5: Moderate content
@@ -256,6 +315,7 @@ async def run_job(job_id: str) -> None:
             if job and job.status == "cancelled":
                 logger.info(f"{LOG_PREFIX} run_job: Job {job_id} cancelled during moderation step.")
                 return
+        set_job_progress(job_id, "moderation")
         moderation_results = await moderate_content(variants)
 
         # Step 6: Save final result
@@ -281,16 +341,18 @@ async def run_job(job_id: str) -> None:
         try:
             from pathlib import Path
             images_dir = Path(f"./tmp/{job_id}/images")
+            # Index variants by id once instead of rescanning the list per missing image
+            variants_by_id = {v.get('id'): v for v in result["post_variants"]}
             missing = []
-            for v in result["post_variants"]:
-                img_path = images_dir / f"{v.get('id')}.png"
+            for variant_id in variants_by_id:
+                img_path = images_dir / f"{variant_id}.png"
                 if not img_path.exists():
-                    missing.append((v.get('id'), img_path))
+                    missing.append((variant_id, img_path))
             if missing:
                 logger.warning(f"Missing images for job={job_id}: {missing}. Attempting one retry generation.")
                 for variant_id, img_path in missing:
                     try:
-                        variant = next((x for x in result["post_variants"] if x["id"] == variant_id), None)
+                        variant = variants_by_id.get(variant_id)
                         if not variant:
                             continue
                         messages = create_image_prompt_messages(
@@ -316,11 +378,7 @@ async def run_job(job_id: str) -> None:
                     except Exception as e:
                         logger.exception(f"Retry generation failed for job={job_id} variant={variant_id}: {e}")
                 await save_json(result, result_path)
-                still_missing = []
-                for v in result["post_variants"]:
-                    img_path = images_dir / f"{v.get('id')}.png"
-                    if not img_path.exists():
-                        still_missing.append((v.get('id'), img_path))
+                still_missing = [(variant_id, img_path) for variant_id, img_path in missing if not img_path.exists()]
                 if still_missing:
                     err_msg = f"Images missing after retry for job={job_id}: {still_missing}"
                     logger.error(err_msg)
@@ -330,6 +388,7 @@ async def run_job(job_id: str) -> None:
                             job.status = "failed"
                             job.error = err_msg
                             session.commit()
+                    notify_status_change(job_id)
                     return
         except Exception:
             logger.exception("Error during image verification/generation step")
@@ -340,6 +399,7 @@ async def run_job(job_id: str) -> None:
                 job.status = "completed"
                 job.result_path = str(result_path)
                 session.commit()
+        notify_status_change(job_id)
         logger.info(f"{LOG_PREFIX} run_job: Job {job_id} completed successfully")
 
     except Exception as e:
@@ -350,6 +410,9 @@ async def run_job(job_id: str) -> None:
                 job.status = "failed"
                 job.error = str(e)
                 session.commit()
+        notify_status_change(job_id)
+    finally:
+        _job_progress.pop(job_id, None)
 
 async def scrape_url(url: str) -> Dict[str, Any]:
     """Scrape content from URL."""
@@ -492,7 +555,8 @@ async def generate_post_variants_with_langchain(summary: str, bullets: List[str]
 
         # Log a safe preview of the raw response for debugging
         try:
-            logger.debug(f"Variants raw response preview (first 10 chars): {response_text[:10]!r}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Variants raw response preview (first 10 chars): {response_text[:10]!r}")
         except Exception:
             logger.debug("Variants raw response preview unavailable")
 
@@ -575,7 +639,8 @@ async def generate_images_with_langchain(variants: List[Dict[str, Any]], image_o
 
             # Generate image (wrapped for better debug visibility)
             try:
-                logger.debug(f"Generating image for job={job_id} variant={variant_id} using provider={provider.__class__.__name__} prompt={image_prompt}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Generating image for job={job_id} variant={variant_id} using provider={provider.__class__.__name__} prompt={image_prompt}")
                 image_data = await provider.generate_image(
                     prompt=image_prompt,
                     negative_prompt=image_options.get('negative_prompt', 'no text, no logos'),
@@ -637,7 +702,8 @@ async def moderate_content(variants: List[Dict[str, Any]]) -> Dict[str, Any]:
                 temperature=0.1
             )
             
-            logger.debug(f"Received moderation response: {moderation_response[:100] if moderation_response else 'EMPTY'}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Received moderation response: {moderation_response[:100] if moderation_response else 'EMPTY'}")
             
             # Check if response is empty
             if not moderation_response or not moderation_response.strip():
@@ -810,7 +876,8 @@ async def regenerate_content(job_id: str, regenerate_type: str, variant: str) ->
                 temperature=0.5
             )
             try:
-                logger.debug(f"Regenerating image for job={job_id} variant={variant} provider={provider.__class__.__name__} prompt={image_prompt}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Regenerating image for job={job_id} variant={variant} provider={provider.__class__.__name__} prompt={image_prompt}")
                 image_data = await provider.generate_image(
                     prompt=image_prompt,
                     negative_prompt=image_options.get('negative_prompt', 'no text, no logos'),
@@ -6,7 +6,6 @@ from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 from .config import settings
 from .utils import safe_write_json, safe_read_json
-from .logger_config import logger
 
 
 def ensure_job_dir(job_id: str) -> Path:
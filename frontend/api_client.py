@@ -3,12 +3,131 @@
 # Third-party imports
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Standard library imports
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # Typing imports
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Hashable, List, Optional
 
 # Local application imports
-from config import API_BASE_URL
+from config import API_BASE_URL, LONG_POLL_WAIT
+
+# Optional faster (de)serializers for API payloads
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# Request bodies are pre-encoded, so the content type is set explicitly
+_JSON_CONTENT_TYPE = {"Content-Type": "application/json"}
+
+# Ask for msgpack when we can decode it; the backend falls back to JSON otherwise
+_STATUS_ACCEPT = "application/msgpack, application/json;q=0.5" if msgpack else "application/json"
+
+def _decode_response(response: requests.Response) -> Any:
+    """Decode a msgpack or JSON response body."""
+    if msgpack and response.headers.get("content-type", "").startswith("application/msgpack"):
+        return msgpack.unpackb(response.content, raw=False)
+    return _json_loads(response.content)
+
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """Return the process-wide HTTP session so connections to the backend are reused."""
+    session = requests.Session()
+    session.headers["Accept"] = "application/json"
+    # Every Streamlit session shares this client, and long-polls hold connections
+    # open, so keep more than the default 10 keep-alive connections to the backend.
+    # Transient gateway errors are retried for idempotent requests only (not POST)
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_resource
+def _background_pool() -> ThreadPoolExecutor:
+    """Return the process-wide pool for requests the UI does not wait on."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="api-background")
+
+def _post_regenerate(job_id: str, regenerate_type: str, variant: str) -> None:
+    """Send a regeneration request, raising on failure."""
+    response = get_http_session().post(
+        f"{API_BASE_URL}/api/v1/posts/{job_id}/regenerate",
+        data=_json_dumps({
+            "regenerate": regenerate_type,
+            "variant": variant
+        }),
+        headers=_JSON_CONTENT_TYPE,
+        timeout=10
+    )
+    response.raise_for_status()
+
+def _post_regenerate_in_turn(job_id: str, regenerate_type: str, variants: List[str]) -> None:
+    """Send regeneration requests one at a time, raising on the first failure.
+
+    The backend only accepts a regeneration while the job is completed and marks it
+    in_progress on each one, so wait for it to settle before sending the next.
+    """
+    for i, variant in enumerate(variants):
+        if i:
+            response = get_http_session().get(
+                f"{API_BASE_URL}/api/v1/posts/{job_id}",
+                params={"wait": LONG_POLL_WAIT, "since_status": "in_progress"},
+                timeout=10 + LONG_POLL_WAIT
+            )
+            response.raise_for_status()
+        _post_regenerate(job_id, regenerate_type, variant)
+
+class _InflightRequests:
+    """Collapse identical requests made concurrently (e.g. from several tabs) into one HTTP call."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Dict[str, Any]] = {}
+
+    def run(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """Return fetch()'s result, sharing it with every caller that arrives while it is running."""
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = {"done": threading.Event(), "result": None, "error": None}
+                self._calls[key] = call
+
+        if is_leader:
+            try:
+                call["result"] = fetch()
+            except Exception as e:
+                call["error"] = e
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call["done"].set()
+        else:
+            call["done"].wait()
+
+        if call["error"] is not None:
+            raise call["error"]
+        return call["result"]
+
+# Process-wide, so polls for the same job from different sessions share one request
+_inflight_status = _InflightRequests()
 
 class APIClient:
     """Client for communicating with the AI Social Post Generator API."""
@@ -17,29 +136,46 @@ class APIClient:
     def create_job(url: str, opinion: str, tone: str, image_options: Dict[str, Any]) -> Optional[str]:
         """Create a new job and return job_id."""
         try:
-            response = requests.post(
+            response = get_http_session().post(
                 f"{API_BASE_URL}/api/v1/posts",
-                json={
+                data=_json_dumps({
                     "url": url,
                     "opinion": opinion,
                     "tone": tone,
                     "image_options": image_options
-                },
+                }),
+                headers=_JSON_CONTENT_TYPE,
                 timeout=10
             )
             response.raise_for_status()
-            return response.json().get("job_id")
+            return _json_loads(response.content).get("job_id")
         except Exception as e:
             st.error(f"Error creating job: {e}")
             return None
     
     @staticmethod
-    def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
-        """Get the status and result of a job."""
-        try:
-            response = requests.get(f"{API_BASE_URL}/api/v1/posts/{job_id}", timeout=10)
+    def get_job_status(job_id: str, wait: float = 0, since_status: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get the status and result of a job.
+
+        With wait > 0 the backend holds the request open (long-poll) until the job
+        leaves since_status or the wait expires.
+        """
+        params = {}
+        if wait and since_status:
+            params = {"wait": wait, "since_status": since_status}
+
+        def _fetch() -> Dict[str, Any]:
+            response = get_http_session().get(
+                f"{API_BASE_URL}/api/v1/posts/{job_id}",
+                params=params,
+                headers={"Accept": _STATUS_ACCEPT},
+                timeout=10 + wait
+            )
             response.raise_for_status()
-            return response.json()
+            return _decode_response(response)
+
+        try:
+            return _inflight_status.run((job_id, tuple(sorted(params.items()))), _fetch)
         except Exception as e:
             st.error(f"Error getting job status: {e}")
             return None
@@ -48,34 +184,37 @@ class APIClient:
     def regenerate_content(job_id: str, regenerate_type: str, variant: str) -> bool:
         """Regenerate specific content for a variant."""
         try:
-            response = requests.post(
-                f"{API_BASE_URL}/api/v1/posts/{job_id}/regenerate",
-                json={
-                    "regenerate": regenerate_type,
-                    "variant": variant
-                },
-                timeout=10
-            )
-            response.raise_for_status()
+            _post_regenerate(job_id, regenerate_type, variant)
             return True
         except Exception as e:
             st.error(f"Error regenerating content: {e}")
             return False
     
+    @staticmethod
+    def submit_regenerate(job_id: str, regenerate_type: str, variant: str) -> Future:
+        """Send a regeneration request in the background; the future raises if it failed."""
+        return _background_pool().submit(_post_regenerate, job_id, regenerate_type, variant)
+    
+    @staticmethod
+    def submit_regenerate_many(job_id: str, regenerate_type: str, variants: List[str]) -> Future:
+        """Send regeneration requests for several variants in turn in the background."""
+        return _background_pool().submit(_post_regenerate_in_turn, job_id, regenerate_type, variants)
+    
     @staticmethod
     def publish_post(job_id: str, variant: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Publish a post variant to LinkedIn."""
         try:
-            response = requests.post(
+            response = get_http_session().post(
                 f"{API_BASE_URL}/api/v1/posts/{job_id}/publish",
-                json={
+                data=_json_dumps({
                     "variant": variant,
                     "user_id": user_id
-                },
+                }),
+                headers=_JSON_CONTENT_TYPE,
                 timeout=10
             )
             response.raise_for_status()
-            return response.json()
+            return _json_loads(response.content)
         except Exception as e:
             st.error(f"Error publishing post: {e}")
             return None
\ No newline at end of file
@@ -1,21 +1,23 @@
 # frontend/config.py
 
-# Standard library imports
-from pathlib import Path
-
 # API Configuration
 API_BASE_URL = "http://localhost:8000"
-
-# Project Configuration
-PROJECT_ROOT = Path(__file__).parent.parent
-TMP_DIR = PROJECT_ROOT / "tmp"
+# Backend URL as seen from the user's browser (used for the job status WebSocket);
+# set it when the browser can't reach API_BASE_URL (e.g. http://backend:8000 inside Docker)
+API_PUBLIC_URL = API_BASE_URL
 
 # Timing Configuration
 MAX_WAIT_TIME = 120  # 2 minutes
-POLL_INTERVAL = 2    # 2 seconds
+MAX_WAIT_EXTENDED = MAX_WAIT_TIME + 60  # after "Wait 1 More Minute"
+LONG_POLL_WAIT = 25  # seconds the backend may hold a status request open
+LOADING_POLL_WAIT = 3  # shorter hold for the loading screen, whose script thread can't handle clicks meanwhile
+
+# Image Preview Configuration
+PREVIEW_MAX_SIZE = 512     # longest side, in pixels, of images shown in the results view
+PREVIEW_WEBP_QUALITY = 85
 
 # Session State Keys
-SESSION_KEYS = [
+SESSION_KEYS: frozenset[str] = frozenset({
     'job_id',
     'job_status',
     'job_result',
@@ -23,8 +25,9 @@ SESSION_KEYS = [
     'extended_wait',
     'form_data',
     'show_results',
-    'image_status'
-]
+    'image_status',
+    'job_progress'
+})
 
 # Custom CSS for styling
 CUSTOM_CSS = """
@@ -122,5 +125,21 @@ CUSTOM_CSS = """
         font-size: 0.9rem;
         color: #495057;
     }
+    
+    /* Article URL input in the post form */
+    div[data-testid="stTextInput"] > div > div > input {
+        width: 100% !important;
+        min-width: 500px;
+        max-width: 100%;
+        word-wrap: break-word;
+        overflow-wrap: break-word;
+        white-space: normal;
+        padding: 0.5rem;
+        border-radius: 4px;
+        border: 1px solid #ccc;
+    }
+    div[data-testid="stTextInput"] {
+        width: 100%;
+    }
 </style>
-"""
\ No newline at end of file
+"""
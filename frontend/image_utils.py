@@ -2,45 +2,110 @@
 
 # Third-party imports
 import streamlit as st
-from PIL import Image, ImageDraw, ImageFont
 
 # Standard library imports
-import time
-from pathlib import Path
-from typing import Optional
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
 
 # Local application imports
-from config import TMP_DIR
+from api_client import get_http_session
+from config import API_BASE_URL, PREVIEW_MAX_SIZE, PREVIEW_WEBP_QUALITY
 
-def get_image_path(job_id: str, variant: str) -> Path:
-    """Get the local path to an image file."""
-    return TMP_DIR / job_id / "images" / f"{variant}.png"
+# Recently fetched previews as (ETag, preview bytes), keyed by (job_id, variant)
+_PREVIEW_CACHE_SIZE = 64
+_preview_cache: "OrderedDict[Tuple[str, str], Tuple[str, bytes]]" = OrderedDict()
+_preview_cache_lock = threading.Lock()
 
-def image_exists(job_id: str, variant: str) -> bool:
-    """Check if an image file exists."""
-    image_path = get_image_path(job_id, variant)
-    return image_path.exists() and image_path.is_file()
-
-def load_image(job_id: str, variant: str) -> Optional[Image.Image]:
-    """Load an image from the local filesystem."""
+@lru_cache(maxsize=1)
+def _placeholder_font():
+    """Load the placeholder font once instead of on every draw."""
+    from PIL import ImageFont
     try:
-        image_path = get_image_path(job_id, variant)
-        if image_path.exists():
-            return Image.open(image_path)
+        return ImageFont.load_default()
+    except Exception:
         return None
-    except Exception as e:
-        st.error(f"Error loading image: {e}")
+
+def get_image_url(job_id: str, variant: str) -> str:
+    """Get the backend URL of an image file."""
+    return f"{API_BASE_URL}/api/v1/images/{job_id}/{variant}.png"
+
+def _encode_preview(data: bytes) -> bytes:
+    """Downscale image bytes and re-encode them as WebP for display."""
+    from PIL import Image
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.thumbnail((PREVIEW_MAX_SIZE, PREVIEW_MAX_SIZE), Image.LANCZOS)
+            buffer = io.BytesIO()
+            img.save(buffer, format="WEBP", quality=PREVIEW_WEBP_QUALITY, method=4)
+            return buffer.getvalue()
+    except (OSError, KeyError):
+        # Undecodable image or Pillow built without WebP support; serve the original bytes
+        return data
+
+def fetch_image(job_id: str, variant: str) -> Optional[bytes]:
+    """Fetch an image's preview bytes from the backend, or None if it doesn't exist yet.
+
+    Requests are conditional on the cached ETag, so an unchanged image costs a bodiless 304.
+    """
+    key = (job_id, variant)
+    with _preview_cache_lock:
+        cached = _preview_cache.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    response = get_http_session().get(get_image_url(job_id, variant), headers=headers, timeout=10)
+    if response.status_code == 304 and cached:
+        return cached[1]
+    if response.status_code == 404:
+        with _preview_cache_lock:
+            _preview_cache.pop(key, None)
         return None
+    response.raise_for_status()
+    
+    preview = _encode_preview(response.content)
+    etag = response.headers.get("etag")
+    if etag:
+        with _preview_cache_lock:
+            _preview_cache[key] = (etag, preview)
+            _preview_cache.move_to_end(key)
+            while len(_preview_cache) > _PREVIEW_CACHE_SIZE:
+                _preview_cache.popitem(last=False)
+    return preview
+
+@st.cache_resource
+def _image_io_pool() -> ThreadPoolExecutor:
+    """Return the process-wide worker pool used for image fetches."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="image-io")
+
+def load_images(job_id: str, variants: Iterable[str]) -> Dict[str, Optional[bytes]]:
+    """Load the existing images for several variants concurrently.
+
+    Variants without an image yet are left out; images that fail to load map to None.
+    """
+    pool = _image_io_pool()
+    futures = {variant: pool.submit(fetch_image, job_id, variant) for variant in variants}
+    images = {}
+    for variant, future in futures.items():
+        try:
+            image = future.result()
+        except Exception:
+            images[variant] = None
+            continue
+        if image is not None:
+            images[variant] = image
+    return images
 
-def create_animated_placeholder(variant_id: str, status: str = "Generating...") -> Image.Image:
-    """Create an animated placeholder image."""
+@lru_cache(maxsize=16)
+def create_animated_placeholder(variant_id: str, status: str = "Generating...") -> bytes:
+    """Create an in-progress placeholder image, as PNG bytes drawn once per variant and status."""
+    # PIL is imported here so fetching images never loads it
+    from PIL import Image, ImageDraw
+    
     img = Image.new('RGB', (400, 250), color='#f0f0f0')
     draw = ImageDraw.Draw(img)
-    
-    try:
-        font = ImageFont.load_default()
-    except:
-        font = None
+    font = _placeholder_font()
     
     # Draw rounded rectangle
     draw.rounded_rectangle([10, 10, 390, 240], radius=10, outline='#1f77b4', width=3)
@@ -49,35 +114,21 @@ def create_animated_placeholder(variant_id: str, status: str = "Generating...")
     draw.text((200, 80), f"Variant {variant_id}", fill='#1f77b4', anchor="mm", font=font)
     
     # Draw status with loading dots
-    dots = "." * ((int(time.time()) % 3) + 1)
-    draw.text((200, 120), f"{status}{dots}", fill='#666666', anchor="mm", font=font)
+    draw.text((200, 120), f"{status}...", fill='#666666', anchor="mm", font=font)
     
     # Draw progress bar
     bar_width = 200
     bar_height = 10
     bar_x = 100
     bar_y = 160
-    progress = (int(time.time()) % 100) / 100
+    # Fixed fill: the frame only changed on reruns anyway, so it never really animated
+    progress = 1 / 3
     
     # Background bar
     draw.rectangle([bar_x, bar_y, bar_x + bar_width, bar_y + bar_height], fill='#e9ecef')
     # Progress bar
     draw.rectangle([bar_x, bar_y, bar_x + int(bar_width * progress), bar_y + bar_height], fill='#1f77b4')
     
-    return img
-
-def create_placeholder_image(variant_id: str, status: str = "Generating...") -> Image.Image:
-    """Create a placeholder image with status text."""
-    img = Image.new('RGB', (300, 200), color='#f0f0f0')
-    draw = ImageDraw.Draw(img)
-    
-    try:
-        font = ImageFont.load_default()
-    except:
-        font = None
-    
-    draw.rectangle([20, 20, 280, 180], outline='#666666', width=3)
-    draw.text((150, 80), f"Variant {variant_id}", fill='#666666', anchor="mm", font=font)
-    draw.text((150, 120), status, fill='#666666', anchor="mm", font=font)
-    
-    return img
\ No newline at end of file
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
@@ -12,10 +12,13 @@ from ui_components import (
     apply_custom_styles, 
     render_form, 
     render_loading_screen, 
+    render_loading_controls,
+    render_extend_wait,
     render_results, 
-    reset_session
+    reset_session,
+    listen_job_status
 )
-from config import SESSION_KEYS, POLL_INTERVAL, MAX_WAIT_TIME
+from config import SESSION_KEYS, LOADING_POLL_WAIT, MAX_WAIT_TIME, MAX_WAIT_EXTENDED
 
 
 # Set page configuration - this must be the first Streamlit command
@@ -27,10 +30,161 @@ st.set_page_config(
 )
 
 def initialize_session_state():
-    """Initialize session state variables."""
-    for key in SESSION_KEYS:
-        if key not in st.session_state:
-            st.session_state[key] = None
+    """Initialize session state variables (once per session)."""
+    if "_init_done" not in st.session_state:
+        st.session_state.update({key: None for key in SESSION_KEYS})
+        # A reloaded page starts a new session; pick the job back up from the URL
+        st.session_state.job_id = st.query_params.get("job_id")
+        st.session_state._init_done = True
+
+def _error_with_retry(message: str) -> None:
+    """Show an error with a button that resets the session to start over."""
+    st.error(message)
+    if st.button("Start Over", key="start_over"):
+        reset_session()
+        st.rerun()
+
+def render_results_page() -> None:
+    """Render the completed job's results and the button to start a new post."""
+    render_results(st.session_state.job_result, st.session_state.job_id)
+    
+    # Add a "Create New Post" button with custom styling
+    st.markdown("---")
+    if st.button("🆕 Create New Post", type="primary", use_container_width=True):
+        reset_session()
+        st.rerun()
+
+def render_job_progress(job_id: str, polling: bool) -> None:
+    """Render the loading phase of a job until it reaches a terminal status."""
+    # Results rendered by this panel rerun it when their widgets are used
+    if st.session_state.show_results and st.session_state.job_result:
+        render_results_page()
+        return
+    
+    # Read the clock once per run; the fragment reruns on its own, so this can't come from main()
+    now = time.time()
+    
+    # Initialize start time if not set
+    if not st.session_state.start_time:
+        st.session_state.start_time = now
+    
+    # Calculate elapsed time
+    elapsed_time = int(now - st.session_state.start_time)
+    
+    # Check if we should extend the wait time
+    max_wait = MAX_WAIT_EXTENDED if st.session_state.extended_wait else MAX_WAIT_TIME
+    
+    if elapsed_time < max_wait and not st.session_state.job_result:
+        if polling:
+            # Update the loading screen in place while the backend holds each request
+            # open until the job changes (long-poll), without rerunning the script.
+            # Widget clicks are only handled between requests, so each hold is kept short
+            placeholder = st.empty()
+            # Own slot so the cancel button can be cleared once the job finishes
+            controls = st.empty()
+            with controls.container():
+                render_loading_controls(elapsed_time)
+            # Stop at the point where the extend-wait prompt becomes due, or at the final timeout
+            deadline = MAX_WAIT_TIME if elapsed_time < MAX_WAIT_TIME else max_wait
+            status_response = {
+                "status": st.session_state.job_status or "queued",
+                **(st.session_state.job_progress or {})
+            }
+            while status_response and status_response.get("status") in ("queued", "in_progress") and elapsed_time < deadline:
+                with placeholder.container():
+                    render_loading_screen(
+                        status_response["status"],
+                        elapsed_time,
+                        progress=status_response.get("progress"),
+                        stage=status_response.get("stage", ""),
+                        show_controls=False
+                    )
+                # Never hold the request past the deadline
+                status_response = APIClient.get_job_status(
+                    job_id,
+                    wait=max(min(LOADING_POLL_WAIT, deadline - elapsed_time), 1),
+                    since_status=status_response["status"]
+                )
+                elapsed_time = int(time.time() - st.session_state.start_time)
+                if status_response:
+                    # Remember where it got to in case the panel is rerun
+                    st.session_state.job_status = status_response.get("status")
+                    st.session_state.job_progress = {
+                        "progress": status_response.get("progress"),
+                        "stage": status_response.get("stage", "")
+                    }
+            placeholder.empty()
+            if status_response and status_response.get("status") in ("queued", "in_progress"):
+                if not st.session_state.extended_wait:
+                    # Offer the extra minute here; a rerun would already be past the wait and time out
+                    with placeholder.container():
+                        render_loading_screen(
+                            status_response["status"],
+                            elapsed_time,
+                            progress=status_response.get("progress"),
+                            stage=status_response.get("stage", ""),
+                            show_controls=False
+                        )
+                        render_extend_wait()
+                    return
+                # Extended wait used up; show the timeout here rather than rerunning into it
+                controls.empty()
+                _error_with_retry("Job is taking longer than expected. Please try again later.")
+                return
+            controls.empty()
+        else:
+            # Prefer status pushed over the backend WebSocket; each message reruns this panel
+            status_response = listen_job_status(job_id)
+            if status_response is None:
+                # Not connected yet; the first pushed message will trigger the next run
+                render_loading_screen(st.session_state.job_status or "queued", elapsed_time)
+                return
+            if status_response.get("fallback"):
+                # Socket unavailable; poll the job status over HTTP instead
+                st.session_state[f"status_polling_{job_id}"] = True
+                st.rerun()
+        
+        if status_response:
+            job_status = status_response.get("status")
+            st.session_state.job_status = job_status
+            
+            if job_status == "completed":
+                # Render the results in this run rather than rerunning just to flip show_results
+                st.session_state.job_result = status_response.get("result", {})
+                st.session_state.show_results = True
+                render_results_page()
+                return
+            elif job_status in ["failed", "cancelled", "not_found"]:
+                _error_with_retry("Job failed. Please try again.")
+            else:
+                # Still processing
+                render_loading_screen(
+                    job_status or "unknown",
+                    elapsed_time,
+                    progress=status_response.get("progress"),
+                    stage=status_response.get("stage", "")
+                )
+        else:
+            _error_with_retry("Failed to get job status")
+    else:
+        # Either we have results or we've exceeded the wait time
+        if st.session_state.job_result:
+            st.session_state.show_results = True
+            render_results_page()
+        elif not st.session_state.extended_wait:
+            # First wait used up; the controls offer one more minute before giving up
+            render_loading_screen(
+                st.session_state.job_status or "queued",
+                elapsed_time,
+                **(st.session_state.job_progress or {})
+            )
+        else:
+            _error_with_retry("Job is taking longer than expected. Please try again later.")
+
+# Run the loading phase as a fragment (Streamlit >= 1.33) so status updates only rerun
+# the progress panel; older versions fall back to full-script reruns
+HAS_FRAGMENT = hasattr(st, "fragment")
+_job_progress_panel = st.fragment(render_job_progress) if HAS_FRAGMENT else render_job_progress
 
 def main():
     """Main application logic."""
@@ -44,63 +198,10 @@ def main():
     if st.session_state.job_id and not st.session_state.show_results:
         # We're in the loading phase
         job_id = st.session_state.job_id
-        
-        # Initialize start time if not set
-        if not st.session_state.start_time:
-            st.session_state.start_time = time.time()
-        
-        # Calculate elapsed time
-        elapsed_time = int(time.time() - st.session_state.start_time)
-        
-        # Check if we should extend the wait time
-        max_wait = MAX_WAIT_TIME + (60 if st.session_state.extended_wait else 0)
-        
-        if elapsed_time < max_wait and not st.session_state.job_result:
-            # Still waiting, poll the job status
-            status_response = APIClient.get_job_status(job_id)
-            
-            if status_response:
-                job_status = status_response.get("status")
-                st.session_state.job_status = job_status
-                
-                if job_status == "completed":
-                    st.session_state.job_result = status_response.get("result", {})
-                    st.session_state.show_results = True
-                    st.rerun()
-                elif job_status in ["failed", "cancelled"]:
-                    st.markdown('<div class="error-message">Job failed. Please try again.</div>', unsafe_allow_html=True)
-                    if st.button("Start Over"):
-                        reset_session()
-                        st.rerun()
-                else:
-                    # Still processing
-                    render_loading_screen(job_status or "unknown", elapsed_time)
-                    time.sleep(POLL_INTERVAL)
-                    st.rerun()
-            else:
-                st.markdown('<div class="error-message">Failed to get job status</div>', unsafe_allow_html=True)
-                if st.button("Start Over"):
-                    reset_session()
-                    st.rerun()
-        else:
-            # Either we have results or we've exceeded the wait time
-            if st.session_state.job_result:
-                st.session_state.show_results = True
-                st.rerun()
-            else:
-                st.markdown('<div class="error-message">Job is taking longer than expected. Please try again later.</div>', unsafe_allow_html=True)
-                if st.button("Start Over"):
-                    reset_session()
-                    st.rerun()
+        _job_progress_panel(job_id, polling=bool(st.session_state.get(f"status_polling_{job_id}")))
     elif st.session_state.show_results and st.session_state.job_result:
         # Show the results
-        render_results(st.session_state.job_result, st.session_state.job_id)
-        
-        # Add a "Create New Post" button with custom styling
-        st.markdown("---")
-        if st.button("🆕 Create New Post", type="primary", use_container_width=True):
-            reset_session()
-            st.rerun()
+        render_results_page()
     else:
         # Show the form
         form_data = render_form()
@@ -119,9 +220,11 @@ def main():
                     st.markdown('<div class="success-message">Job created successfully!</div>', unsafe_allow_html=True)
                     st.session_state.job_id = job_id
                     st.session_state.form_data = form_data
+                    # Keep the job in the URL so a reload resumes it instead of losing it
+                    st.query_params["job_id"] = job_id
                     st.rerun()
                 else:
-                    st.markdown('<div class="error-message">Failed to create job. Please try again.</div>', unsafe_allow_html=True)
+                    st.error("Failed to create job. Please try again.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
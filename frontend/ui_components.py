@@ -2,24 +2,74 @@
 
 # Third-party imports
 import streamlit as st
-from typing import Dict, Any
+import streamlit.components.v1 as components
+from typing import Dict, Any, List, Optional
 
-# Third-party imports
-import streamlit as st
+# Standard library imports
+import re
+import time
+from pathlib import Path
 
 # Local application imports
 from api_client import APIClient
-from config import MAX_WAIT_TIME, CUSTOM_CSS
-from image_utils import image_exists, load_image, create_animated_placeholder
+from config import API_PUBLIC_URL, MAX_WAIT_TIME, CUSTOM_CSS
+
+# Client-side WebSocket listener that pushes job status changes back to Python
+_job_status_component = components.declare_component(
+    "job_status_listener",
+    path=str(Path(__file__).parent / "components" / "job_status")
+)
+
+# CUSTOM_CSS without comments and indentation; it is sent with every run, so keep it small
+_STYLES_HTML = re.sub(r"\s+", " ", re.sub(r"/\*.*?\*/", "", CUSTOM_CSS, flags=re.DOTALL)).strip()
+
+# Loading-screen status messages keyed by job status
+_STATUS_TEXT = {
+    "queued": "🔄 Your job is queued and will start processing soon",
+    "in_progress": "⚙️ Your job is currently being processed",
+}
+
+# Loading-screen pipeline steps and the backend progress at which each one starts
+_PIPELINE_STEPS = (
+    ("📥 Scraping article content", 10),
+    ("📝 Generating summary", 30),
+    ("✍️ Creating post variants", 50),
+    ("🎨 Generating images", 70),
+    ("✅ Moderating content", 90),
+)
+
+# Post form title and tagline, sent to the browser as one element
+_FORM_HEADER_HTML = (
+    '<h1 class="main-header">🚀 AI Social Post Generator</h1>'
+    '<p style="text-align: center; font-size: 1.2rem; color: #666;">'
+    'Transform any article into engaging LinkedIn posts with AI-generated images</p>'
+)
+
+# Static post form choices, built once at import instead of on every rerun
+_OPINION_OPTIONS = (
+    "Agree — I support the main arguments",
+    "Disagree — I have different views",
+    "Neutral — Presenting balanced perspective",
+    "Custom opinion...",
+)
+_TONE_OPTIONS = ("professional", "conversational", "enthusiastic", "thoughtful", "analytical")
+_STYLE_OPTIONS = ("photographic", "illustrated", "flat", "abstract")
+_ASPECT_RATIO_OPTIONS = ("16:9", "1:1", "4:3", "3:2")
+_DEFAULT_NEGATIVE_PROMPT = "no text, no logos, no watermarks, no signatures"
+
+# Joins hashtags into styled chips in one pass instead of formatting each tag separately
+_HASHTAG_SEPARATOR = '</span> <span class="hashtag">#'
+
+# Repeat clicks on the same action within this window are ignored (covers double-clicks)
+_ACTION_DEBOUNCE_SECONDS = 0.5
 
 def apply_custom_styles():
-    """Apply custom CSS styles to the app."""
-    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+    """Apply custom CSS styles to the app (a single prebuilt block, including the form styles)."""
+    st.markdown(_STYLES_HTML, unsafe_allow_html=True)
 
 def render_form():
     """Render the post creation form with improved styling."""
-    st.markdown('<h1 class="main-header">🚀 AI Social Post Generator</h1>', unsafe_allow_html=True)
-    st.markdown('<p style="text-align: center; font-size: 1.2rem; color: #666;">Transform any article into engaging LinkedIn posts with AI-generated images</p>', unsafe_allow_html=True)
+    st.markdown(_FORM_HEADER_HTML, unsafe_allow_html=True)
     
     st.markdown("---")
     
@@ -27,26 +77,6 @@ def render_form():
         # URL input with icon and expanded width
         st.markdown("### 📰 Article URL")
         
-        # Apply custom CSS for the URL input field
-        st.markdown("""
-        <style>
-        div[data-testid="stTextInput"] > div > div > input {
-            width: 100% !important;
-            min-width: 500px;
-            max-width: 100%;
-            word-wrap: break-word;
-            overflow-wrap: break-word;
-            white-space: normal;
-            padding: 0.5rem;
-            border-radius: 4px;
-            border: 1px solid #ccc;
-        }
-        div[data-testid="stTextInput"] {
-            width: 100%;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        
         url = st.text_input(
             "URL",
             placeholder="https://example.com/article",
@@ -57,16 +87,9 @@ def render_form():
         
         # Opinion selection with icon
         st.markdown("### 💭 Your Opinion")
-        opinion_options = [
-            "Agree — I support the main arguments",
-            "Disagree — I have different views",
-            "Neutral — Presenting balanced perspective",
-            "Custom opinion..."
-        ]
-        
         opinion_choice = st.selectbox(
             "Opinion",
-            options=opinion_options,
+            options=_OPINION_OPTIONS,
             help="Choose your stance on the article content",
             label_visibility="collapsed"
         )
@@ -89,7 +112,7 @@ def render_form():
         st.markdown("### 🎭 Post Tone")
         tone = st.selectbox(
             "Tone",
-            options=["professional", "conversational", "enthusiastic", "thoughtful", "analytical"],
+            options=_TONE_OPTIONS,
             help="Choose the tone that best fits your audience and message",
             label_visibility="collapsed"
         )
@@ -102,20 +125,20 @@ def render_form():
         with col1:
             style = st.selectbox(
                 "Image Style",
-                options=["photographic", "illustrated", "flat", "abstract"],
+                options=_STYLE_OPTIONS,
                 help="Choose the visual style for generated images"
             )
             
             aspect_ratio = st.selectbox(
                 "Aspect Ratio",
-                options=["16:9", "1:1", "4:3", "3:2"],
+                options=_ASPECT_RATIO_OPTIONS,
                 help="Choose the aspect ratio for generated images"
             )
         
         with col2:
             negative_prompt = st.text_area(
                 "Negative Prompts",
-                value="no text, no logos, no watermarks, no signatures",
+                value=_DEFAULT_NEGATIVE_PROMPT,
                 help="Specify what should NOT appear in the generated images",
                 max_chars=200,
                 height=100
@@ -149,53 +172,59 @@ def render_form():
     
     return None
 
-def render_loading_screen(job_status: str, elapsed_time: int):
+def listen_job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    """Subscribe to pushed status updates for a job.
+
+    Returns the latest message from the backend WebSocket, None until the first
+    message arrives, or {"fallback": True} if the socket could not be kept open.
+    """
+    # The socket is opened by the browser, so it needs the browser-facing backend URL
+    ws_url = API_PUBLIC_URL.replace("http", "ws", 1) + f"/api/v1/ws/posts/{job_id}"
+    return _job_status_component(url=ws_url, key=f"job_status_{job_id}", default=None)
+
+def render_loading_screen(job_status: str, elapsed_time: int, progress: Optional[int] = None, stage: str = "", show_controls: bool = True):
     """Render an enhanced loading screen with animations."""
     st.markdown('<h1 class="main-header">⏳ Generating Your Social Post</h1>', unsafe_allow_html=True)
     
-    # Progress bar with custom styling
-    progress = min(elapsed_time / MAX_WAIT_TIME, 1.0)
-    progress_bar = st.progress(progress)
-    
-    # Status message with custom styling
-    if job_status == "queued":
-        status_text = "🔄 Your job is queued and will start processing soon"
-    elif job_status == "in_progress":
-        status_text = "⚙️ Your job is currently being processed"
+    # Progress bar driven by the pipeline progress reported by the backend
+    if progress is None:
+        st.progress(min(elapsed_time / MAX_WAIT_TIME, 1.0))
     else:
-        status_text = f"🔄 Processing your post (Status: {job_status})"
+        st.progress(min(progress, 100) / 100, text=stage or None)
     
-    st.markdown(f'<div class="status-info">{status_text}</div>', unsafe_allow_html=True)
+    # Status message with custom styling
+    status_text = _STATUS_TEXT.get(job_status) or f"🔄 Processing your post (Status: {job_status})"
     
     # Time remaining with custom styling
     remaining = max(MAX_WAIT_TIME - elapsed_time, 0)
     minutes, seconds = divmod(int(remaining), 60)
-    st.markdown(f'<p style="text-align: center; font-size: 1.1rem; color: #666;">⏱️ Time remaining: {minutes:02d}:{seconds:02d}</p>', unsafe_allow_html=True)
     
-    # Animated processing steps
-    st.markdown("### 📊 Processing Steps")
-    
-    steps = [
-        ("📥 Scraping article content", job_status != "queued"),
-        ("📝 Generating summary", job_status == "in_progress"),
-        ("✍️ Creating post variants", job_status == "in_progress"),
-        ("🎨 Generating images", job_status == "in_progress"),
-        ("✅ Moderating content", job_status == "in_progress")
+    # Status, time remaining and the processing steps go out as one element;
+    # blank lines between blocks keep the markdown heading rendering as before
+    blocks = [
+        f'<div class="status-info">{status_text}</div>',
+        f'<p style="text-align: center; font-size: 1.1rem; color: #666;">⏱️ Time remaining: {minutes:02d}:{seconds:02d}</p>',
+        "### 📊 Processing Steps",
     ]
-    
-    for step_text, is_active in steps:
+    for step_text, step_progress in _PIPELINE_STEPS:
+        if progress is None:
+            is_active = job_status == "in_progress"
+        else:
+            is_active = progress >= step_progress
         if is_active:
-            st.markdown(f'<div class="loading-pulse">✅ {step_text}</div>', unsafe_allow_html=True)
+            blocks.append(f'<div class="loading-pulse">✅ {step_text}</div>')
         else:
-            st.markdown(f'<div style="color: #999;">⏳ {step_text}</div>', unsafe_allow_html=True)
+            blocks.append(f'<div style="color: #999;">⏳ {step_text}</div>')
+    st.markdown("\n\n".join(blocks), unsafe_allow_html=True)
     
+    if show_controls:
+        render_loading_controls(elapsed_time)
+
+def render_loading_controls(elapsed_time: int):
+    """Render the extend-wait and cancel buttons shown under the loading screen."""
     # Extend wait button with custom styling
     if elapsed_time >= MAX_WAIT_TIME and not st.session_state.extended_wait:
-        st.markdown("---")
-        st.warning("⏱️ Taking longer than expected. Images can take up to 5 minutes to generate.")
-        if st.button("⏳ Wait 1 More Minute", key="extend_wait", type="secondary"):
-            st.session_state.extended_wait = True
-            st.rerun()
+        render_extend_wait()
     
     # Cancel button with custom styling
     st.markdown("---")
@@ -203,24 +232,36 @@ def render_loading_screen(job_status: str, elapsed_time: int):
         reset_session()
         st.rerun()
 
+def render_extend_wait():
+    """Render the prompt offering to wait one more minute for a slow job."""
+    st.markdown("---")
+    st.warning("⏱️ Taking longer than expected. Images can take up to 5 minutes to generate.")
+    if st.button("⏳ Wait 1 More Minute", key="extend_wait", type="secondary"):
+        st.session_state.extended_wait = True
+        st.rerun()
+
 def render_results(job_result: Dict[str, Any], job_id: str):
     """Render enhanced results with improved card design."""
+    # Imported here so the form and loading views never load PIL
+    from image_utils import load_images
+    
     st.markdown('<h1 class="main-header">🎉 Your Social Posts Are Ready!</h1>', unsafe_allow_html=True)
     
     # Display provenance with card styling only if content exists
-    provenance = job_result.get("provenance", {})
-    if provenance and (provenance.get("title") or provenance.get("source_url") or provenance.get("excerpt")):
+    provenance = job_result.get("provenance") or {}
+    title, source_url, excerpt = provenance.get("title"), provenance.get("source_url"), provenance.get("excerpt")
+    if title or source_url or excerpt:
         st.markdown("### 📚 Source Information")
         st.markdown('<div class="post-card">', unsafe_allow_html=True)
         col1, col2 = st.columns(2)
         with col1:
-            if provenance.get("title"):
-                st.markdown(f"**Title:** {provenance.get('title', 'No title available')}")
+            if title:
+                st.markdown(f"**Title:** {title}")
         with col2:
-            if provenance.get("source_url"):
-                st.markdown(f"**URL:** [{provenance.get('source_url', '#')}]({provenance.get('source_url', '#')})")
-        if provenance.get("excerpt"):
-            st.markdown(f"**Excerpt:** {provenance.get('excerpt', 'No excerpt available')}")
+            if source_url:
+                st.markdown(f"**URL:** [{source_url}]({source_url})")
+        if excerpt:
+            st.markdown(f"**Excerpt:** {excerpt}")
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Display post variants with enhanced cards
@@ -231,96 +272,182 @@ def render_results(job_result: Dict[str, Any], job_id: str):
     
     st.markdown("### 📝 Generated Post Variants")
     
-    for variant in post_variants:
-        variant_id = variant.get("id", "Unknown")
+    # Fetch every variant's image in parallel and hand the results to this run's cards
+    variant_ids = [variant.get("id", "Unknown") for variant in post_variants]
+    images = load_images(job_id, variant_ids)
+    st.session_state[f"_prefetched_images_{job_id}"] = {
+        variant_id: (variant_id in images, images.get(variant_id)) for variant_id in variant_ids
+    }
+    
+    # Retry every missing image with one click; the requests are sent in turn in the background
+    missing = [variant_id for variant_id in variant_ids if variant_id not in images]
+    if len(missing) > 1 and st.button("🔄 Retry All Missing Images", key="retry_all_images"):
+        _request_regenerations(job_id, "image", missing)
+    
+    # Lay the variants out side by side in one grid pass
+    for column, variant in zip(st.columns(len(post_variants)), post_variants):
+        with column:
+            _variant_card(job_id, variant)
+
+def render_variant_card(job_id: str, variant: Dict[str, Any]):
+    """Render one post variant's card with its text, image and actions."""
+    from image_utils import create_animated_placeholder, fetch_image
+    
+    variant_id = variant.get("id", "Unknown")
+    
+    # Use the image prefetched by render_results once; it isn't passed in because a
+    # fragment rerun reuses the arguments of the last full run, so a regenerated image
+    # would never show up. Fragment reruns fetch it again (a 304 if unchanged)
+    prefetched = st.session_state.get(f"_prefetched_images_{job_id}", {}).pop(variant_id, None)
+    if prefetched is not None:
+        has_image, image = prefetched
+    else:
+        try:
+            image = fetch_image(job_id, variant_id)
+            has_image = image is not None
+        except Exception:
+            image, has_image = None, True
+    
+    st.markdown(f'<div class="post-card">', unsafe_allow_html=True)
+    st.markdown(f"#### Variant {variant_id}")
+    
+    # Create columns for layout
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        # Post text with better styling
+        st.markdown("**Post Text:**")
+        edited_text = st.text_area(
+            f"text_{variant_id}",
+            value=variant.get("text", ""),
+            height=150,
+            key=f"text_edit_{variant_id}",
+            help="Edit the post text as needed",
+            label_visibility="collapsed"
+        )
         
-        st.markdown(f'<div class="post-card">', unsafe_allow_html=True)
-        st.markdown(f"#### Variant {variant_id}")
+        # Hashtags with custom styling
+        st.markdown("**Hashtags:**")
+        hashtags = variant.get("hashtags", [])
+        if hashtags:
+            hashtag_html = '<span class="hashtag">#' + _HASHTAG_SEPARATOR.join(map(str, hashtags)) + '</span>'
+            st.markdown(hashtag_html, unsafe_allow_html=True)
+        else:
+            st.info("No hashtags")
         
-        # Create columns for layout
-        col1, col2 = st.columns([2, 1])
+        # Suggested comment with better styling
+        st.markdown("**Suggested Comment:**")
+        suggested_comment = variant.get("suggested_comment", "")
+        if suggested_comment:
+            st.markdown(f'<div class="success-message">{suggested_comment}</div>', unsafe_allow_html=True)
+        else:
+            st.info("No comment suggested")
+    
+    with col2:
+        # Image display with enhanced styling
+        st.markdown("**Generated Image:**")
         
-        with col1:
-            # Post text with better styling
-            st.markdown("**Post Text:**")
-            edited_text = st.text_area(
-                f"text_{variant_id}",
-                value=variant.get("text", ""),
-                height=150,
-                key=f"text_edit_{variant_id}",
-                help="Edit the post text as needed",
-                label_visibility="collapsed"
-            )
-            
-            # Hashtags with custom styling
-            st.markdown("**Hashtags:**")
-            hashtags = variant.get("hashtags", [])
-            if hashtags:
-                hashtag_html = " ".join([f'<span class="hashtag">#{tag}</span>' for tag in hashtags])
-                st.markdown(hashtag_html, unsafe_allow_html=True)
-            else:
-                st.info("No hashtags")
-            
-            # Suggested comment with better styling
-            st.markdown("**Suggested Comment:**")
-            suggested_comment = variant.get("suggested_comment", "")
-            if suggested_comment:
-                st.markdown(f'<div class="success-message">{suggested_comment}</div>', unsafe_allow_html=True)
+        # Show the image if the backend has one for this variant
+        if has_image:
+            if image:
+                st.image(image, caption="Generated Image", use_container_width=True)
             else:
-                st.info("No comment suggested")
-        
-        with col2:
-            # Image display with enhanced styling
-            st.markdown("**Generated Image:**")
+                st.error("Failed to load image")
+        else:
+            # Show animated placeholder
+            placeholder = create_animated_placeholder(variant_id, "Generating")
+            st.image(placeholder, caption="Generating Image...", use_container_width=True)
             
-            # Check if image exists locally
-            if image_exists(job_id, variant_id):
-                image = load_image(job_id, variant_id)
-                if image:
-                    st.image(image, caption="Generated Image", use_container_width=True)
-                else:
-                    st.error("Failed to load image")
+            # Retry button with custom styling
+            if st.button(f"🔄 Retry Image", key=f"retry_{variant_id}"):
+                _request_regeneration(job_id, "image", variant_id)
+    
+    # Action buttons with better layout
+    st.markdown("**Actions:**")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        if st.button(f"🔄 Regenerate Text", key=f"regen_text_{variant_id}"):
+            _request_regeneration(job_id, "text", variant_id)
+    
+    with col2:
+        if st.button(f"🎨 Regenerate Image", key=f"regen_image_{variant_id}"):
+            _request_regeneration(job_id, "image", variant_id)
+    
+    with col3:
+        if st.button(f"📤 Publish to LinkedIn", key=f"publish_{variant_id}", type="primary") and _debounce(f"publish_{job_id}_{variant_id}"):
+            result = APIClient.publish_post(job_id, variant_id, "demo_user")
+            if result and result.get("published"):
+                st.markdown('<div class="success-message">✅ Successfully published to LinkedIn!</div>', unsafe_allow_html=True)
             else:
-                # Show animated placeholder
-                placeholder = create_animated_placeholder(variant_id, "Generating")
-                st.image(placeholder, caption="Generating Image...", use_container_width=True)
-                
-                # Retry button with custom styling
-                if st.button(f"🔄 Retry Image", key=f"retry_{variant_id}"):
-                    if APIClient.regenerate_content(job_id, "image", variant_id):
-                        st.success("Image regeneration started")
-                        st.rerun()
-        
-        # Action buttons with better layout
-        st.markdown("**Actions:**")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            if st.button(f"🔄 Regenerate Text", key=f"regen_text_{variant_id}"):
-                if APIClient.regenerate_content(job_id, "text", variant_id):
-                    st.success("Text regeneration started")
-                    st.rerun()
-        
-        with col2:
-            if st.button(f"🎨 Regenerate Image", key=f"regen_image_{variant_id}"):
-                if APIClient.regenerate_content(job_id, "image", variant_id):
-                    st.success("Image regeneration started")
-                    st.rerun()
-        
-        with col3:
-            if st.button(f"📤 Publish to LinkedIn", key=f"publish_{variant_id}", type="primary"):
-                result = APIClient.publish_post(job_id, variant_id, "demo_user")
-                if result and result.get("published"):
-                    st.markdown('<div class="success-message">✅ Successfully published to LinkedIn!</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown('<div class="error-message">Failed to publish to LinkedIn</div>', unsafe_allow_html=True)
-        
-        st.markdown('</div>', unsafe_allow_html=True)
+                st.markdown('<div class="error-message">Failed to publish to LinkedIn</div>', unsafe_allow_html=True)
+    
+    _render_regeneration_status(job_id, variant_id)
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def _debounce(action_key: str) -> bool:
+    """Return False if the same action was triggered within the debounce window."""
+    now = time.monotonic()
+    state_key = f"_last_action_{action_key}"
+    if now - st.session_state.get(state_key, 0.0) < _ACTION_DEBOUNCE_SECONDS:
+        return False
+    st.session_state[state_key] = now
+    return True
+
+def _regeneration_allowed(job_id: str, regenerate_type: str, variant_id: str) -> bool:
+    """Return False while a request for this variant is in flight or was just made."""
+    # Coalesce repeat clicks: skip while a request for this variant is still in flight
+    pending = st.session_state.get(f"regen_{job_id}_{variant_id}")
+    return not (pending and not pending[1].done()) and _debounce(f"regen_{regenerate_type}_{job_id}_{variant_id}")
+
+def _request_regeneration(job_id: str, regenerate_type: str, variant_id: str):
+    """Submit a regeneration request without waiting for the backend to acknowledge it."""
+    if not _regeneration_allowed(job_id, regenerate_type, variant_id):
+        return
+    st.session_state[f"regen_{job_id}_{variant_id}"] = (
+        regenerate_type,
+        APIClient.submit_regenerate(job_id, regenerate_type, variant_id)
+    )
+
+def _request_regenerations(job_id: str, regenerate_type: str, variant_ids: List[str]):
+    """Submit regeneration requests for several variants, sent one after another."""
+    variant_ids = [
+        variant_id for variant_id in variant_ids
+        if _regeneration_allowed(job_id, regenerate_type, variant_id)
+    ]
+    if not variant_ids:
+        return
+    # The backend rejects a regeneration while another one holds the job, so they can't overlap
+    future = APIClient.submit_regenerate_many(job_id, regenerate_type, variant_ids)
+    for variant_id in variant_ids:
+        st.session_state[f"regen_{job_id}_{variant_id}"] = (regenerate_type, future)
+
+def _render_regeneration_status(job_id: str, variant_id: str):
+    """Show the state of a variant's last regeneration request, clearing it once reported."""
+    key = f"regen_{job_id}_{variant_id}"
+    pending = st.session_state.get(key)
+    if not pending:
+        return
+    regenerate_type, future = pending
+    label = regenerate_type.capitalize()
+    if not future.done():
+        st.info(f"⏳ {label} regeneration requested")
+        return
+    del st.session_state[key]
+    error = future.exception()
+    if error:
+        st.error(f"Error regenerating content: {error}")
+    else:
+        st.success(f"{label} regeneration started")
+
+# Each card is its own fragment (Streamlit >= 1.33), so using one variant's widgets
+# reruns only that card instead of the whole results page
+_variant_card = st.fragment(render_variant_card) if hasattr(st, "fragment") else render_variant_card
 
 def reset_session():
     """Reset the session state."""
     from config import SESSION_KEYS
     
-    for key in SESSION_KEYS:
-        if key in st.session_state:
-            del st.session_state[key]
\ No newline at end of file
+    st.session_state.update({key: None for key in SESSION_KEYS})
+    st.query_params.pop("job_id", None)
\ No newline at end of file
@@ -13,6 +13,25 @@ def clear_console():
     else:
         os.system("clear")
 
+def wait_for_first_exit(procs: dict) -> tuple:
+    """Block until one of the named processes exits and return its name and exit code."""
+    if hasattr(os, "waitid"):
+        # Sleep in the kernel until a child exits; WNOWAIT leaves reaping to Popen
+        while True:
+            info = os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOWAIT)
+            for name, proc in procs.items():
+                if info.si_pid == proc.pid:
+                    return name, proc.wait()
+            # Not one of ours; reap it, or waitid would keep returning the same zombie
+            os.waitpid(info.si_pid, 0)
+    # No waitid on Windows; check the processes once a second instead
+    while True:
+        for name, proc in procs.items():
+            code = proc.poll()
+            if code is not None:
+                return name, code
+        time.sleep(1)
+
 def main() -> None:
     # Project root
     root = Path(__file__).parent.resolve()
@@ -30,8 +49,11 @@ def main() -> None:
         "--port",
         os.environ.get("BACKEND_PORT", "8000"),
         "--reload",
+        # Same LOG_LEVEL the backend logger reads; set LOG_LEVEL=DEBUG for verbose output
         "--log-level",
-        "debug",
+        os.environ.get("LOG_LEVEL", "INFO").lower(),
+        # Skip a formatted log line per request; long-polls and image fetches are frequent
+        "--no-access-log",
     ]
 
     # Frontend: streamlit run frontend/streamlit_app.py with debug flags
@@ -76,16 +98,8 @@ def main() -> None:
 
     try:
         # Wait for either process to exit
-        while True:
-            backend_code = backend_proc.poll()
-            frontend_code = frontend_proc.poll()
-            if backend_code is not None:
-                print(f"Backend exited with code {backend_code}.")
-                break
-            if frontend_code is not None:
-                print(f"Frontend exited with code {frontend_code}.")
-                break
-            time.sleep(1)
+        name, code = wait_for_first_exit({"Backend": backend_proc, "Frontend": frontend_proc})
+        print(f"{name} exited with code {code}.")
     except KeyboardInterrupt:
         print("\nStopping services...")
     finally:
@@ -8,13 +8,21 @@ Run this script periodically to manage disk space.
 
 
 # Standard library imports
+import os
 import sys
 import shutil
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import argparse
 
-def cleanup_tmp_directories(base_dir: Path, max_age_hours: int = 24, dry_run: bool = False):
+# Job directories are sized concurrently so their metadata reads overlap
+SIZE_WORKERS = 16
+
+# Units used by format_size, each 1024 times the previous one
+SIZE_NAMES = ("B", "KB", "MB", "GB")
+
+def cleanup_tmp_directories(base_dir: Path, max_age_hours: int = 24, dry_run: bool = False, verbose: bool = False):
     """Clean up temporary job directories older than specified hours."""
     
     tmp_dir = base_dir / "tmp"
@@ -31,19 +39,28 @@ def cleanup_tmp_directories(base_dir: Path, max_age_hours: int = 24, dry_run: bo
     cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
     cleaned_count = 0
     total_size_cleaned = 0
+    remaining_dirs = []
     
-    for job_dir in tmp_dir.iterdir():
-        if not job_dir.is_dir():
+    # Collect the job directories and their ages up front
+    job_dirs = []
+    for entry in os.scandir(tmp_dir):
+        if not entry.is_dir():
             continue
-        
+        try:
+            job_dirs.append((Path(entry.path), datetime.fromtimestamp(entry.stat().st_mtime)))
+        except OSError as e:
+            print(f"❌ Error processing directory {entry.path}: {e}")
+    
+    # Kept directories are only sized for verbose output; size the rest in parallel
+    to_size = [job_dir for job_dir, dir_time in job_dirs if verbose or dir_time < cutoff_time]
+    with ThreadPoolExecutor(max_workers=SIZE_WORKERS) as pool:
+        dir_sizes = dict(zip(to_size, pool.map(get_directory_size, to_size)))
+    
+    for job_dir, dir_time in job_dirs:
+        dir_size = dir_sizes.get(job_dir)
         try:
             # Check if directory is old enough to clean
-            dir_time = datetime.fromtimestamp(job_dir.stat().st_mtime)
-            
             if dir_time < cutoff_time:
-                # Calculate directory size
-                dir_size = get_directory_size(job_dir)
-                
                 print(f"🗑️  Removing: {job_dir.name}")
                 print(f"   Age: {datetime.now() - dir_time}")
                 print(f"   Size: {format_size(dir_size)}")
@@ -54,16 +71,21 @@ def cleanup_tmp_directories(base_dir: Path, max_age_hours: int = 24, dry_run: bo
                     total_size_cleaned += dir_size
                     print(f"   ✅ Removed")
                 else:
+                    remaining_dirs.append((job_dir, dir_size))
                     print(f"   🔍 Would remove (dry run)")
                 
                 print()
             else:
                 # Show directories that are kept
-                dir_size = get_directory_size(job_dir)
                 age = datetime.now() - dir_time
-                print(f"📁 Keeping: {job_dir.name} (Age: {age}, Size: {format_size(dir_size)})")
+                remaining_dirs.append((job_dir, dir_size))
+                if dir_size is None:
+                    print(f"📁 Keeping: {job_dir.name} (Age: {age})")
+                else:
+                    print(f"📁 Keeping: {job_dir.name} (Age: {age}, Size: {format_size(dir_size)})")
                 
         except Exception as e:
+            remaining_dirs.append((job_dir, dir_size))
             print(f"❌ Error processing directory {job_dir}: {e}")
     
     # Summary
@@ -75,13 +97,13 @@ def cleanup_tmp_directories(base_dir: Path, max_age_hours: int = 24, dry_run: bo
         print(f"🗑️  Directories removed: {cleaned_count}")
         print(f"💾 Total space freed: {format_size(total_size_cleaned)}")
     
-    # Show remaining directories
-    remaining_dirs = list(tmp_dir.iterdir())
+    # Show remaining directories, reusing the sizes from the first pass instead of walking them again
     if remaining_dirs:
         print(f"\n📁 Remaining directories: {len(remaining_dirs)}")
-        for job_dir in remaining_dirs:
-            if job_dir.is_dir():
-                dir_size = get_directory_size(job_dir)
+        for job_dir, dir_size in remaining_dirs:
+            if dir_size is None:
+                print(f"   • {job_dir.name}")
+            else:
                 print(f"   • {job_dir.name} ({format_size(dir_size)})")
     else:
         print("\n📁 No temporary directories remaining")
@@ -89,10 +111,16 @@ def cleanup_tmp_directories(base_dir: Path, max_age_hours: int = 24, dry_run: bo
 def get_directory_size(directory: Path) -> int:
     """Calculate the total size of a directory in bytes."""
     total_size = 0
+    pending = [directory]
     try:
-        for path in directory.rglob('*'):
-            if path.is_file():
-                total_size += path.stat().st_size
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    # DirEntry caches its type from the directory listing, and its stat result after one call
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total_size += entry.stat(follow_symlinks=False).st_size
     except Exception:
         pass
     return total_size
@@ -102,14 +130,9 @@ def format_size(size_bytes: int) -> str:
     if size_bytes == 0:
         return "0 B"
     
-    size_names = ["B", "KB", "MB", "GB"]
-    i = 0
-    size = float(size_bytes)
-    while size >= 1024 and i < len(size_names) - 1:
-        size /= 1024
-        i += 1
-    
-    return f"{size:.1f} {size_names[i]}"
+    # Each unit is 2**10 of the previous one, so the bit length picks it directly
+    i = min((size_bytes.bit_length() - 1) // 10, len(SIZE_NAMES) - 1)
+    return f"{size_bytes / (1 << (10 * i)):.1f} {SIZE_NAMES[i]}"
 
 def main():
     """Main function."""
@@ -133,6 +156,11 @@ def main():
         default=".",
         help="Base directory containing the tmp folder (default: current directory)"
     )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Also calculate the size of directories that are kept"
+    )
     
     args = parser.parse_args()
     
@@ -151,7 +179,8 @@ def main():
         cleanup_tmp_directories(
             base_dir=base_dir,
             max_age_hours=args.max_age,
-            dry_run=args.dry_run
+            dry_run=args.dry_run,
+            verbose=args.verbose
         )
     except KeyboardInterrupt:
         print("\n⚠️  Cleanup interrupted by user")